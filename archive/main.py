@@ -1,8 +1,15 @@
 """Simple log search tool using argparse."""
 import argparse
+import mmap
 import re
 
 pat = re.compile(r"failed password", re.IGNORECASE)
+# bytes twin of pat for the mmap path; also accepts the UTF-8 of the non-ASCII characters
+# the str pattern matches case-insensitively (U+0130/U+0131 for "i", U+017F for "s")
+pat_bytes = re.compile(
+    rb"fa(?:i|\xc4\xb0|\xc4\xb1)led pa(?:s|\xc5\xbf)(?:s|\xc5\xbf)word", re.IGNORECASE
+)
+lone_cr = re.compile(rb"\r(?!\n)")
 
 def parse_arg() -> argparse.Namespace:
     """Parse command-line arguments for the log search tool."""
@@ -25,14 +32,55 @@ def parse_arg() -> argparse.Namespace:
 
     return parser.parse_args()
 
-def main() -> None:
-    """Run the log search using the parsed arguments."""
-    args = parse_arg()
-    log_path = args.input
-    keyword = args.keyword
+CHUNK = 1 << 20
+
+def count_newlines(buf) -> int:
+    """Count newlines in an mmap one chunk at a time (mmap has no .count())."""
+    return sum(buf[i:i + CHUNK].count(b"\n") for i in range(0, len(buf), CHUNK))
+
+def line_bounds(buf, pos: int) -> tuple:
+    """Return (start, end) of the line containing byte offset pos."""
+    start = buf.rfind(b"\n", 0, pos) + 1
+    end = buf.find(b"\n", pos)
+    return start, (len(buf) if end == -1 else end)
+
+def keyword_pattern(keyword: str) -> "re.Pattern[bytes]":
+    """Bytes regex equivalent to `keyword.lower() in line.lower()` for an ASCII keyword."""
+    kw = keyword.lower()
+    parts = []
+    for i, ch in enumerate(kw):
+        alts = [re.escape(ch.encode())]
+        if ch == "k":
+            alts.append("\u212a".encode())  # KELVIN SIGN lowercases to "k"
+        if ch == "i" and i == len(kw) - 1:
+            alts.append("\u0130".encode())  # "\u0130".lower() is "i" + combining dot
+        parts.append(b"(?:" + b"|".join(alts) + b")" if len(alts) > 1 else alts[0])
+    return re.compile(b"".join(parts), re.IGNORECASE)
+
+def scan_mmap(buf, keyword: str) -> tuple:
+    """Print matches in the original per-line order; return (total_lines, match_lines)."""
+    total_lines = count_newlines(buf)
+    if buf[-1:] != b"\n":
+        total_lines += 1
+
+    match_lines = {}    # line start -> line end, for lines containing the keyword
+    for m in keyword_pattern(keyword).finditer(buf):
+        start, end = line_bounds(buf, m.start())
+        match_lines[start] = end
+
+    failed_lines = {line_bounds(buf, m.start())[0] for m in pat_bytes.finditer(buf)}
+
+    for start in sorted(match_lines.keys() | failed_lines):
+        if start in match_lines:
+            print(buf[start:match_lines[start]].decode("utf-8", errors="replace").strip())
+        if start in failed_lines:
+            print("Found failed password")
+    return total_lines, len(match_lines)
+
+def scan_lines(log_path: str, keyword: str) -> tuple:
+    """Line-by-line fallback with exact str semantics; return (total_lines, match_lines)."""
     total_lines = 0
     match_lines = 0
-
     with open(log_path, "r", encoding="utf-8", errors="replace") as f:
         for line in f:
             total_lines += 1
@@ -42,6 +90,29 @@ def main() -> None:
 
             if pat.search(line):
                 print("Found failed password")
+    return total_lines, match_lines
+
+def main() -> None:
+    """Run the log search using the parsed arguments."""
+    args = parse_arg()
+    log_path = args.input
+    keyword = args.keyword
+    total_lines = 0
+    match_lines = 0
+
+    # The mmap path needs a non-empty ASCII keyword (an empty one matches at every byte, and
+    # a non-ASCII keyword needs Unicode case folding) and no lone \r, which text mode treats
+    # as a line break.
+    fast = bool(keyword) and keyword.isascii()
+    with open(log_path, "rb") as f:
+        if fast and f.seek(0, 2):  # mmap can't map an empty file
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                if lone_cr.search(buf):
+                    fast = False
+                else:
+                    total_lines, match_lines = scan_mmap(buf, keyword)
+    if not fast:
+        total_lines, match_lines = scan_lines(log_path, keyword)
 
     print(f"total lines: {total_lines}")
     print(f'Lines contiaining "{keyword}": {match_lines}')
@@ -3,8 +3,10 @@
 ci_run_authwatch.py
 
 CI wrapper for authwatch.py:
-- Runs authwatch.py against one or more log files
-- Parses output lines like: [high] failed_password :: ...
+- Runs authwatch.py against one or more log files (in-process when it can be imported,
+  otherwise as a subprocess; --subprocess forces the latter)
+- Collects findings (hits directly in-process, or parsed from output lines like:
+  [high] failed_password :: ...)
 - Produces a JSON report
 - Exits non-zero (fails CI) if thresholds are exceeded
 
@@ -21,20 +23,42 @@ Multiple inputs:
 from __future__ import annotations
 
 import argparse
+import importlib.util
+import io
 import json
 import os
 import re
 import shlex
 import subprocess
 import sys
+import threading
+import traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
 from dataclasses import dataclass, asdict
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from types import ModuleType
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+try:
+    import orjson  # optional: faster report encoding
+except ImportError:
+    orjson = None
 
 
 SEV_ORDER = {"low": 0, "medium": 1, "high": 2, "critical": 3}
 
+# One finding line, anywhere in a stdout blob: (raw, severity, rest). Same rules as
+# parse_finding_line over str.splitlines(), so "line" means any of the characters splitlines()
+# breaks on, not just \n (which is all (?m)^/$ know). [^\S{_BR}] is "whitespace except a line
+# break", so matches never span lines; the lookarounds stand in for ^ and $.
+_BR = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+LINE_RE = re.compile(
+    rf"(?<![^{_BR}])[^\S{_BR}]*(\[([A-Za-z]+)\][^\S{_BR}]+(\S(?:[^{_BR}]*\S)?))[^\S{_BR}]*(?![^{_BR}])"
+)
+
 
 @dataclass
 class Finding:
@@ -50,24 +74,43 @@ def parse_finding_line(line: str) -> Optional[Finding]:
       [low] accepted_password :: Dec 10 ...
     """
     line_stripped = line.strip()
-    m = re.match(r"^\[(?P<sev>[A-Za-z]+)\]\s+(?P<rest>.+)$", line_stripped)
-    if not m:
+    # Plain string slicing instead of a regex: most stdout lines fail the first check.
+    if not line_stripped.startswith("["):
+        return None
+    rb = line_stripped.find("]")
+    if rb < 2:
+        return None
+    sev = line_stripped[1:rb]
+    if not (sev.isascii() and sev.isalpha()):
+        return None
+
+    after = line_stripped[rb + 1:]
+    rest = after.lstrip()
+    # needs whitespace after the severity tag, then something else
+    if not rest or len(rest) == len(after):
         return None
 
-    sev = m.group("sev").lower()
-    rest = m.group("rest")
+    return Finding(severity=sev.lower(), raw=line_stripped, event_type=event_type_of(rest))
+
 
+def event_type_of(rest: str) -> Optional[str]:
     # Try to extract event type before " :: "
-    event_type = None
-    parts = rest.split("::", 1)
-    if parts:
-        # first token chunk e.g. "failed_password "
-        event_type = parts[0].strip().split()[0] if parts[0].strip() else None
+    head = rest.split("::", 1)[0].strip()
+    # first token chunk e.g. "failed_password "
+    return head.split(None, 1)[0] if head else None
+
 
-    return Finding(severity=sev, raw=line_stripped, event_type=event_type)
+def iter_findings(out: str) -> Iterator[Finding]:
+    """
+    All findings in a whole stdout blob, in order. One LINE_RE.finditer pass instead of
+    splitting into lines and calling parse_finding_line on each.
+    """
+    for m in LINE_RE.finditer(out):
+        raw, sev, rest = m.groups()
+        yield Finding(severity=sev.lower(), raw=raw, event_type=event_type_of(rest))
 
 
-def should_ignore(f: Finding, ignore_types: List[str], ignore_sev: List[str]) -> bool:
+def should_ignore(f: Finding, ignore_types: FrozenSet[str], ignore_sev: FrozenSet[str]) -> bool:
     if f.severity in ignore_sev:
         return True
     if f.event_type and f.event_type in ignore_types:
@@ -103,6 +146,84 @@ def run_authwatch(
         return 124, stdout, stderr, cmd
 
 
+def load_authwatch(authwatch_path: Path) -> Optional[ModuleType]:
+    """
+    Import authwatch.py from its path so it can run in-process.
+    Returns None if it can't be imported (caller falls back to a subprocess).
+    """
+    spec = importlib.util.spec_from_file_location("_authwatch_inprocess", authwatch_path)
+    if spec is None or spec.loader is None:
+        return None
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module  # dataclasses look the module up while the class is built
+    try:
+        spec.loader.exec_module(module)
+    except Exception:
+        sys.modules.pop(spec.name, None)
+        return None
+    if not callable(getattr(module, "main", None)):
+        return None
+    return module
+
+
+def run_authwatch_inprocess(
+    authwatch_mod: ModuleType,
+    authwatch_path: Path,
+    input_path: Path,
+    extra_args: List[str],
+    timeout_sec: int,
+) -> Tuple[int, str, str, List[str], List[Finding]]:
+    """
+    Same as run_authwatch, but calls authwatch.main() directly (no interpreter start-up)
+    and collects its hits as Findings instead of parsing them back out of stdout.
+    Returns: (returncode, stdout, stderr, cmd_list, findings)
+    """
+    argv = ["--input", str(input_path)] + extra_args
+    cmd = [str(authwatch_path)] + argv
+    findings: List[Finding] = []
+    result: Dict[str, int] = {}
+
+    def on_hit(hit: dict) -> None:
+        sev = hit["severity"]
+        raw = f'[{sev}] {hit["rule"]} :: {hit["line"]}'.strip()
+        findings.append(Finding(severity=sev.lower(), raw=raw, event_type=hit["rule"]))
+
+    def run() -> None:
+        try:
+            result["rc"] = authwatch_mod.main(argv, on_hit=on_hit)
+        except SystemExit as e:  # argparse errors
+            result["rc"] = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception:
+            # same outcome as a crashed child process: traceback on stderr, non-zero rc
+            traceback.print_exc(file=err)
+            result["rc"] = 1
+
+    out, err = io.StringIO(), io.StringIO()
+    with redirect_stdout(out), redirect_stderr(err):
+        # A thread can't be killed, so a run that overstays the timeout is abandoned instead.
+        # daemon=True keeps it from holding the wrapper open at exit.
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        worker.join(timeout_sec)
+
+    if worker.is_alive():
+        stderr = err.getvalue() + f"\nERROR: authwatch timed out after {timeout_sec}s"
+        return 124, out.getvalue(), stderr, cmd, list(findings)
+    return result["rc"], out.getvalue(), err.getvalue(), cmd, findings
+
+
+def wants_follow(authwatch_mod: ModuleType, extra_args: List[str]) -> bool:
+    """
+    True if the pass-through args turn on --follow, parsed the way authwatch parses them
+    (so abbreviations like --fol count too).
+    """
+    try:
+        with redirect_stderr(io.StringIO()):
+            return bool(getattr(authwatch_mod.parse_args(["--input", "x"] + extra_args), "follow", False))
+    except SystemExit:
+        return False  # bad args: the run itself reports the argparse error and exits
+
+
 def safe_int(x: str) -> int:
     try:
         return int(x)
@@ -123,6 +244,11 @@ def main() -> int:
         default=sys.executable,
         help="Python executable to run (default: current interpreter)",
     )
+    ap.add_argument(
+        "--subprocess",
+        action="store_true",
+        help="Always run authwatch as a subprocess instead of importing it in-process",
+    )
     ap.add_argument(
         "--input",
         action="append",
@@ -200,6 +326,10 @@ def main() -> int:
             print(f"ERROR: input log not found: {p}", file=sys.stderr)
             return 2
 
+    # built once: O(1) membership for every finding checked below
+    ignore_types = frozenset(args.ignore_type)
+    ignore_sev = frozenset(s.lower() for s in args.ignore_severity)
+
     extra_args = shlex.split(args.authwatch_args.strip()) if args.authwatch_args.strip() else []
 
     all_findings: List[Finding] = []
@@ -207,20 +337,47 @@ def main() -> int:
     combined_stderr_chunks: List[str] = []
     run_meta: List[Dict[str, str]] = []
 
-    for p in input_paths:
-        rc, out, err, cmd_list = run_authwatch(
-            python_exe=args.python,
-            authwatch_path=authwatch_path,
-            input_path=p,
-            extra_args=extra_args,
-            timeout_sec=args.timeout,
-        )
-
+    # In-process needs the same interpreter and no follow mode: an endless tail is only
+    # reliably stopped by killing a subprocess
+    authwatch_mod = None
+    same_python = Path(args.python).resolve() == Path(sys.executable).resolve()
+    if not args.subprocess and same_python:
+        authwatch_mod = load_authwatch(authwatch_path)
+        if authwatch_mod is not None and wants_follow(authwatch_mod, extra_args):
+            authwatch_mod = None
+
+    results: List[Tuple[int, str, str, List[str], Optional[List[Finding]]]]
+    if authwatch_mod is not None:
+        # serial: the runs share this process's stdout/stderr redirection
+        results = [
+            run_authwatch_inprocess(authwatch_mod, authwatch_path, p, extra_args, args.timeout)
+            for p in input_paths
+        ]
+    else:
+        # Each run is an independent subprocess, so threads are enough to keep them all busy.
+        # Results are reduced in input order below, so the report stays deterministic.
+        max_workers = min(len(input_paths), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            futures = [
+                ex.submit(
+                    run_authwatch,
+                    python_exe=args.python,
+                    authwatch_path=authwatch_path,
+                    input_path=p,
+                    extra_args=extra_args,
+                    timeout_sec=args.timeout,
+                )
+                for p in input_paths
+            ]
+            results = [fut.result() + (None,) for fut in futures]
+
+    for p, (rc, out, err, cmd_list, findings) in zip(input_paths, results):
         run_meta.append(
             {
                 "input": str(p),
                 "returncode": str(rc),
                 "cmd": " ".join(shlex.quote(x) for x in cmd_list),
+                "mode": "subprocess" if findings is None else "in-process",
             }
         )
 
@@ -233,11 +390,11 @@ def main() -> int:
             # Still try to parse stdout if any, but note failure
             print(f"ERROR: authwatch returned non-zero for {p}: rc={rc}", file=sys.stderr)
 
-        for line in out.splitlines():
-            f = parse_finding_line(line)
-            if not f:
-                continue
-            if should_ignore(f, ignore_types=args.ignore_type, ignore_sev=[s.lower() for s in args.ignore_severity]):
+        if findings is None:
+            findings = list(iter_findings(out))
+
+        for f in findings:
+            if should_ignore(f, ignore_types=ignore_types, ignore_sev=ignore_sev):
                 continue
             all_findings.append(f)
 
@@ -245,23 +402,22 @@ def main() -> int:
     stdout_out = Path(args.stdout_out)
     stdout_out.write_text("".join(combined_stdout_chunks + combined_stderr_chunks), encoding="utf-8")
 
+    # Tally once (Counter runs in C), then work on the handful of distinct severities
+    # instead of walking every finding again.
+    sev_tally = Counter(f.severity.lower() for f in all_findings)
+
     counts: Dict[str, int] = {"critical": 0, "high": 0, "medium": 0, "low": 0, "unknown": 0}
-    for f in all_findings:
-        sev = f.severity.lower()
+    for sev, n in sev_tally.items():
         if sev in counts:
-            counts[sev] += 1
+            counts[sev] += n
         else:
-            counts["unknown"] += 1
+            counts["unknown"] += n
 
     # Determine pass/fail
     fail_threshold_sev = args.fail_on_severity.lower()
     fail_threshold_rank = SEV_ORDER.get(fail_threshold_sev, SEV_ORDER["high"])
 
-    any_at_or_above = False
-    for f in all_findings:
-        if SEV_ORDER.get(f.severity.lower(), -1) >= fail_threshold_rank:
-            any_at_or_above = True
-            break
+    any_at_or_above = any(SEV_ORDER.get(sev, -1) >= fail_threshold_rank for sev in sev_tally)
 
     too_many = (
         counts.get("high", 0) > args.max_high
@@ -307,7 +463,10 @@ def main() -> int:
         "stdout_artifact": str(stdout_out),
     }
 
-    Path(args.json_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if orjson is not None:
+        Path(args.json_out).write_bytes(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+    else:
+        Path(args.json_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
 
     # If failing, print a small sample to console for quick debugging
     if exit_code != 0 and all_findings:
@@ -2,28 +2,57 @@ from __future__ import annotations
 
 import argparse
 import json
+import mmap
 import re
 import sys
 import time
 import os
-import msvcrt
 import ctypes
 from time import monotonic
 from dataclasses import dataclass
-from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterator, Optional, TextIO
+from typing import BinaryIO, Callable, Iterator, Optional
 from collections import Counter
 
-IP_RE = re.compile(r"\bfrom\s+(?P<ip>\d{1,3}(?:\.\d{1,3}){3})\b")
+try:
+    import msvcrt  # Windows only; used by follow mode
+except ImportError:
+    msvcrt = None
+
+try:
+    import hyperscan  # optional: multi-pattern block scanner for scan mode
+except ImportError:
+    hyperscan = None
+
+try:
+    import orjson  # optional: faster JSONL encoding
+except ImportError:
+    orjson = None
+
+# Octets are range-checked by the pattern itself (0-255, at most 3 digits, leading zeros allowed).
+# ASCII digits only: a str \d would also match e.g. Arabic-Indic digits.
+# The second alternative takes any other dotted quad (e.g. "from 300.1.1.1") with no "ip" group,
+# so the first "from <a.b.c.d>" on the line decides the result instead of a later valid one.
+_OCTET = r"(?:25[0-5]|2[0-4][0-9]|[01]?[0-9]?[0-9])"
+IP_RE = re.compile(rf"\bfrom\s+(?:(?P<ip>{_OCTET}(?:\.{_OCTET}){{3}})|[0-9]{{1,3}}(?:\.[0-9]{{1,3}}){{3}})\b")
 USER_RE = re.compile(r"\bfor\s+(?:invalid user\s+)?(?P<user>[A-Za-z0-9._-]+)\b")
 SEV_RANK = {"low": 1, "med": 2, "high": 3}
+JSONL_BUFFER_BYTES = 1 << 20
+READ_BLOCK_BYTES = 1 << 20
+JSONL_FLUSH_EVERY = 1000  # hits between explicit flushes in scan mode
+STDOUT_BATCH = 1000       # printed hits per stdout write in scan mode
+
+_gmtime = time.gmtime
+_strftime = time.strftime
+_ts_cache = [-1, ""]  # [epoch second, formatted timestamp]
 
 @dataclass(frozen=True)
 class Rule:
       name: str
       pattern: re.Pattern
       severity: str   # 'low' 'med' 'high'
+      literal: str    # substring every match must contain; lowercased when ignore_case
+      severity_rank: int  # SEV_RANK[severity], resolved once here instead of per hit
       
 def severity_ok(sev: str, min_sev: str) -> bool:
     return SEV_RANK.get(sev, 0) >= SEV_RANK.get(min_sev, 0)
@@ -32,8 +61,8 @@ def extract_user(line: str) -> Optional[str]:
     m = USER_RE.search(line)
     return m.group("user") if m else None
 
-def infer_service(line: str) -> Optional[str]:
-    s = line.lower()
+def infer_service(line: str, low: Optional[str] = None) -> Optional[str]:
+    s = low if low is not None else line.lower()
     if "sshd" in s:
         return "sshd"
     if "sudo" in s:
@@ -41,100 +70,374 @@ def infer_service(line: str) -> Optional[str]:
     return None
      
 def utc_now_iso() -> str:
-      return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00","Z")
+      # the format has one-second resolution, so only re-format when the second changes
+      now = int(time.time())
+      if now != _ts_cache[0]:
+            _ts_cache[0] = now
+            _ts_cache[1] = _strftime("%Y-%m-%dT%H:%M:%SZ", _gmtime(now))
+      return _ts_cache[1]
 
 def build_rules(ignore_case: bool) -> list[Rule]:
       flags = re.IGNORECASE if ignore_case else 0
+      fold = str.lower if ignore_case else str
       
+      # Each pattern starts with a plain literal so the cheap `in` check can reject most lines
+      # before the regex runs. (The old "^\w+\s+sudo:" alternative was already covered by "\bsudo:".)
       return [
             Rule(
                   name="failed_password",
                   pattern=re.compile(r"\bFailed password\b",flags),
                   severity="high",
+                  literal=fold("Failed password"),
+                  severity_rank=SEV_RANK["high"],
             ),
             Rule(
                   name="accepted_password",
                   pattern=re.compile(r"\bAccepted password\b",flags),
                   severity="low",
+                  literal=fold("Accepted password"),
+                  severity_rank=SEV_RANK["low"],
             ),
             Rule(
                   name="sudo",
-                  pattern=re.compile(r"^\w+\s+sudo:|\bsudo:",flags),
+                  pattern=re.compile(r"\bsudo:",flags),
                   severity="med",
+                  literal=fold("sudo:"),
+                  severity_rank=SEV_RANK["med"],
             ),
       ]
 
-def iter_hits_from_line(line:str, rules: list[Rule],  path: Path) -> Iterator[dict]:
+def extract_fields(line: str, low: Optional[str] = None) -> tuple[Optional[str], Optional[str], Optional[str]]:
+      # (src_ip, user, service): depends only on the line, so it's computed once and shared by
+      # every rule that hits the same line
+      return extract_ip(line), extract_user(line), infer_service(line, low)
+
+def make_hit(line: str, rule: Rule, path: Path, ts: str, fields: tuple) -> dict:
+      src_ip, user, service = fields
+      return {
+            "ts": ts,
+            "rule": rule.name,
+            "severity": rule.severity,
+            "sev_rank": rule.severity_rank,
+            "path": str(path),
+            "line": line.rstrip("\n"),
+            "src_ip": src_ip,
+            "user": user,
+            "service": service,
+      }
+
+def iter_hits_from_line(line:str, rules: list[Rule],  path: Path, min_sev_rank: int = 0) -> Iterator[dict]:
+      low = None  # only lowercase the line if a case-insensitive rule needs it
+      ts = None   # one timestamp per line, taken on its first hit
+      fields = None  # extracted on the first hit, reused by later rules on this line
       for rule in rules:
+            # below --min-severity: skip before any regex or extraction work
+            if rule.severity_rank < min_sev_rank:
+                  continue
+            if rule.pattern.flags & re.IGNORECASE:
+                  if low is None:
+                        low = line.lower()
+                  # re.IGNORECASE also matches "ı", "İ", "ſ" for the ASCII letters, but
+                  # str.lower() leaves them non-ASCII: only an ASCII line can be rejected here
+                  if rule.literal not in low and line.isascii():
+                        continue
+            elif rule.literal not in line:
+                  continue
             if rule.pattern.search(line):
-                  src_ip = extract_ip(line)
-                  user = extract_user(line)
-                  service = infer_service(line)
-
-                  yield {
-                  "ts": utc_now_iso(),
-                  "rule": rule.name,
-                  "severity": rule.severity,
-                  "path": str(path),
-                  "line": line.rstrip("\n"),
-                  "src_ip": src_ip,
-                  "user": user,
-                  "service": service,
-                  }
-
-def scan_file(path: Path, rules: list[Rule]) -> Iterator[dict]:
-      with path.open("r", encoding="utf-8", errors="replace") as f:
-            for line in f:
-                  yield from iter_hits_from_line(line, rules,path)
-                  
-def follow_file(path: Path, rules: list[Rule], sleep_s: float = 0.25):
+                  if fields is None:
+                        ts = utc_now_iso()
+                        fields = extract_fields(line, low)
+                  yield make_hit(line, rule, path, ts, fields)
+
+def build_hs_database(rules: list[Rule]):
+    """
+    Compile every rule into one Hyperscan block-mode database (pattern id = rule index).
+    If any rule is case-insensitive, id len(rules) matches every non-ASCII byte: Hyperscan
+    only folds ASCII case, so those lines must reach the regex check for the caseless rules.
+    """
+    expressions = [rule.pattern.pattern.encode("utf-8") for rule in rules]
+    flags = []
+    for rule in rules:
+        f = hyperscan.HS_FLAG_MULTILINE
+        if rule.pattern.flags & re.IGNORECASE:
+            f |= hyperscan.HS_FLAG_CASELESS
+        flags.append(f)
+    if any(rule.pattern.flags & re.IGNORECASE for rule in rules):
+        expressions.append(rb"[\x80-\xff]")
+        flags.append(0)
+
+    db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    db.compile(
+        expressions=expressions,
+        ids=list(range(len(expressions))),
+        elements=len(expressions),
+        flags=flags,
+    )
+    return db
+
+def scan_file_hs(path: Path, rules: list[Rule]) -> Iterator[dict]:
+    # One pass over the whole mmap'd file; the callback only records which rules hit which line.
+    # Hyperscan is a prefilter only: its \b and case folding are ASCII-only while the Python
+    # patterns are Unicode-aware, so candidate lines are decoded and confirmed by the regex path.
+    if path.stat().st_size == 0:
+        return
+    db = build_hs_database(rules)
+    non_ascii_id = len(rules)
+    caseless_ids = {i for i, rule in enumerate(rules) if rule.pattern.flags & re.IGNORECASE}
+
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        line_hits: dict[int, set[int]] = {}
+
+        def on_match(rule_id: int, start: int, end: int, flags: int, context) -> None:
+            # end is exclusive and the patterns never match a newline, so the line holding the
+            # match starts right after the last newline before it
+            line_start = buf.rfind(b"\n", 0, end) + 1
+            line_hits.setdefault(line_start, set()).add(rule_id)
+
+        db.scan(buf, match_event_handler=on_match)
+
+        for line_start in sorted(line_hits):
+            line_end = buf.find(b"\n", line_start)
+            if line_end == -1:
+                line_end = len(buf)
+            ids = line_hits[line_start]
+            if non_ascii_id in ids:
+                ids = (ids - {non_ascii_id}) | caseless_ids
+            candidates = [rules[rule_id] for rule_id in sorted(ids)]
+            # _split_lines also breaks on a lone \r, like text-mode iteration does
+            for line in _split_lines(buf[line_start:line_end]):
+                yield from iter_hits_from_line(line, candidates, path)
+
+def _split_lines(data: bytes) -> list[str]:
+    # decode a whole block at once; mirror text-mode universal newlines
+    text = data.decode("utf-8", errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = text.split("\n")
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+def iter_blocks(path: Path, block_size: int = READ_BLOCK_BYTES) -> Iterator[bytes]:
+    """Yield path as large blocks that each end on a line boundary (except possibly the last)."""
+    # pieces of the unfinished line, joined once its newline arrives (not re-copied per block)
+    carry: list[bytes] = []
+    with path.open("rb", buffering=0) as f:
+        while True:
+            chunk = f.read(block_size)
+            if not chunk:
+                break
+            cut = chunk.rfind(b"\n")
+            if cut == -1:
+                carry.append(chunk)
+                continue
+            # only complete lines go out; the tail waits for the next block
+            if carry:
+                carry.append(chunk[:cut + 1])
+                yield b"".join(carry)
+                carry = []
+            else:
+                yield chunk[:cut + 1]
+            if cut + 1 < len(chunk):
+                carry.append(chunk[cut + 1:])
+    if carry:
+        yield b"".join(carry)
+
+def find_candidate_lines(block: bytes, needles: list[bytes]) -> list[tuple[int, int]]:
+    """Return the sorted (start, end) spans of the lines in block containing any needle."""
+    spans = set()
+    for needle in needles:
+        pos = block.find(needle)
+        while pos != -1:
+            start = block.rfind(b"\n", 0, pos) + 1
+            end = block.find(b"\n", pos)
+            if end == -1:
+                end = len(block)
+            spans.add((start, end))
+            pos = block.find(needle, end)  # rest of this line is already a candidate
+    return sorted(spans)
+
+_NON_ASCII = re.compile(rb"[\x80-\xff]")
+
+def find_non_ascii_lines(block: bytes) -> list[tuple[int, int]]:
+    """Return the sorted (start, end) spans of the lines in block holding any non-ASCII byte."""
+    spans = []
+    m = _NON_ASCII.search(block)
+    while m:
+        start = block.rfind(b"\n", 0, m.start()) + 1
+        end = block.find(b"\n", m.end())
+        if end == -1:
+            end = len(block)
+        spans.append((start, end))
+        m = _NON_ASCII.search(block, end)
+    return spans
+
+def scan_file(path: Path, rules: list[Rule], min_sev_rank: int = 0) -> Iterator[dict]:
+      rules = [r for r in rules if r.severity_rank >= min_sev_rank]
+      if hyperscan is not None:
+            # filtered-out rules are never compiled or matched
+            yield from scan_file_hs(path, rules)
+            return
+
+      # Every match contains its rule's literal, so find candidate lines with bytes.find over the
+      # raw block (C-level search) and only decode + regex-check those lines.
+      cs_needles = [r.literal.encode("utf-8") for r in rules if not r.pattern.flags & re.IGNORECASE]
+      ci_needles = [r.literal.encode("utf-8") for r in rules if r.pattern.flags & re.IGNORECASE]
+      for block in iter_blocks(path):
+            spans = find_candidate_lines(block, cs_needles)
+            if ci_needles:
+                  # bytes.lower() is ASCII-only and keeps offsets, so spans index the original block
+                  spans = set(spans).union(find_candidate_lines(block.lower(), ci_needles))
+                  if not block.isascii():
+                        # ... and misses "ı", "İ", "ſ", which re.IGNORECASE folds to ASCII letters
+                        spans.update(find_non_ascii_lines(block))
+                  spans = sorted(spans)
+            for start, end in spans:
+                  for line in _split_lines(block[start:end]):
+                        yield from iter_hits_from_line(line, rules, path)
+
+IN_MODIFY = 0x00000002
+
+def _inotify_waiter(path: Path):
+    """Linux: (wait, close) blocking on an inotify IN_MODIFY watch for path, or None."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        inotify_init1 = libc.inotify_init1
+        inotify_add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+
+    fd = inotify_init1(os.O_CLOEXEC)
+    if fd < 0:
+        return None
+    if inotify_add_watch(fd, os.fsencode(str(path)), IN_MODIFY) < 0:
+        os.close(fd)
+        return None
+
+    def wait() -> None:
+        # blocks until the file is written; one read drains all queued events
+        os.read(fd, 4096)
+
+    return wait, lambda: os.close(fd)
+
+def _rdcw_waiter(path: Path, timeout_s: float):
+    """
+    Windows: (wait, close) on ReadDirectoryChangesW for path's directory (needs pywin32), or None.
+    wait() returns on the next change in the directory or after timeout_s, whichever is first.
+    """
+    try:
+        import pywintypes
+        import win32con
+        import win32event
+        import win32file
+    except ImportError:
+        return None
+
+    try:
+        handle = win32file.CreateFile(
+            str(path.parent),
+            0x0001,  # FILE_LIST_DIRECTORY
+            win32con.FILE_SHARE_READ | win32con.FILE_SHARE_WRITE | win32con.FILE_SHARE_DELETE,
+            None,
+            win32con.OPEN_EXISTING,
+            win32con.FILE_FLAG_BACKUP_SEMANTICS | win32con.FILE_FLAG_OVERLAPPED,
+            None,
+        )
+    except pywintypes.error:
+        return None
+    notify = win32con.FILE_NOTIFY_CHANGE_LAST_WRITE | win32con.FILE_NOTIFY_CHANGE_SIZE
+    timeout_ms = max(1, int(timeout_s * 1000))
+    buf = win32file.AllocateReadBuffer(8192)
+    overlapped = pywintypes.OVERLAPPED()
+    overlapped.hEvent = win32event.CreateEvent(None, True, False, None)
+
+    def submit() -> None:
+        win32event.ResetEvent(overlapped.hEvent)
+        win32file.ReadDirectoryChangesW(handle, buf, False, notify, overlapped)
+
+    def wait() -> None:
+        # Size/last-write changes of a file its writer keeps open are only reported once the
+        # cache is flushed, so never block past timeout_s: the caller re-reads either way.
+        # On timeout the request stays pending for the next call.
+        if win32event.WaitForSingleObject(overlapped.hEvent, timeout_ms) == win32event.WAIT_TIMEOUT:
+            return
+        win32file.GetOverlappedResult(handle, overlapped, True)
+        # re-arm before returning so writes made while the caller reads aren't missed
+        submit()
+
+    def close() -> None:
+        handle.Close()
+        overlapped.hEvent.Close()
+
+    submit()
+    return wait, close
+
+def follow_file(path: Path, rules: list[Rule], sleep_s: float = 0.25, min_sev_rank: int = 0):
     # Open in a way that allows other processes to write (Windows share-friendly)
     fd = os.open(str(path), os.O_RDONLY)
+
+    # Sleep only until the OS reports a write (at most sleep_s on Windows); poll every sleep_s
+    # if no notifier is available.
+    # Set up before seeking to the end so no write can slip in between.
+    waiter = _rdcw_waiter(path, sleep_s) if msvcrt is not None else _inotify_waiter(path)
+    wait, close_waiter = waiter or ((lambda: time.sleep(sleep_s)), (lambda: None))
     try:
         # Put the file descriptor into binary mode (avoid CRLF translation issues)
-        msvcrt.setmode(fd, os.O_BINARY)
+        if msvcrt is not None:
+            msvcrt.setmode(fd, os.O_BINARY)
 
         with os.fdopen(fd, "r", encoding="utf-8", errors="replace") as f:
             f.seek(0, 2)  # SEEK_END
             while True:
                 line = f.readline()
                 if not line:
-                    time.sleep(sleep_s)
+                    wait()
                     continue
-                yield from iter_hits_from_line(line, rules, path)
+                yield from iter_hits_from_line(line, rules, path, min_sev_rank)
     finally:
-        # os.fdopen closes fd, so only close if something failed before wrapping
-        pass
+        # os.fdopen closes fd; the change notifier has its own handle
+        close_waiter()
                         
-def print_hit(hit: dict) -> None:
+def format_hit(hit: dict) -> str:
       # human friendly
-      print(f'[{hit["severity"]}] {hit["rule"]} :: {hit["line"]}')
+      return f'[{hit["severity"]}] {hit["rule"]} :: {hit["line"]}\n'
+
+def flush_output(out_buf: list[str]) -> None:
+      # one write for a whole batch of formatted hits (sys.stdout looked up now, so redirects work)
+      if out_buf:
+            sys.stdout.write("".join(out_buf))
+            out_buf.clear()
       
-def write_jsonl(hit: dict, fp: TextIO) -> None:
-      fp.write(json.dumps(hit, ensure_ascii=False) + "\n")
-      fp.flush()
+if orjson is not None:
+      def dumps_jsonl(obj: dict) -> bytes:
+            return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+else:
+      def dumps_jsonl(obj: dict) -> bytes:
+            return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+def write_jsonl(hit: dict, fp: BinaryIO) -> None:
+      # no flush here: main flushes in batches (and close() flushes the rest)
+      fp.write(dumps_jsonl(hit))
       
-def normalize_ip(ip: str) -> Optional[str]:
-    parts = ip.split(".")
-    if len(parts) != 4:
-        return None
-    try:
-        nums = [int(p) for p in parts]  # removes leading zeros naturally
-    except ValueError:
-        return None
-    if any(n < 0 or n > 255 for n in nums):
-        return None
-    return ".".join(str(n) for n in nums)
+def normalize_ip(ip: str) -> str:
+    # IP_RE already guarantees four 0-255 octets; only leading zeros ("010") need rewriting
+    if not (ip.startswith("0") or ".0" in ip):
+        return ip
+    return ".".join(str(int(p)) for p in ip.split("."))
 
 def extract_ip(line: str) -> Optional[str]:
     m = IP_RE.search(line)
-    if not m:
+    ip = m.group("ip") if m else None
+    if ip is None:
         return None
-    return normalize_ip(m.group("ip"))
+    return normalize_ip(ip)
 
 
 def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
-      p = argparse.ArgumentParser(description="Watch authlogs for suspicious security events")
+      p = argparse.ArgumentParser(prog="authwatch.py", description="Watch authlogs for suspicious security events")
       p.add_argument(
             "--input",
             required=True,
@@ -187,7 +490,9 @@ def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
 
       return p.parse_args(argv)
 
-def main(argv: Optional[list[str]] = None) -> int:
+def main(argv: Optional[list[str]] = None, on_hit: Optional[Callable[[dict], None]] = None) -> int:
+    # on_hit: called with every hit that is printed, so in-process callers (ci_run_authwatch)
+    # get the hit dicts directly instead of re-parsing stdout
     args = parse_args(argv)
     path = Path(args.input)
 
@@ -200,54 +505,68 @@ def main(argv: Optional[list[str]] = None) -> int:
 
     rules = build_rules(ignore_case=args.ignore_case)
 
-    json_fp: Optional[TextIO] = None
+    json_fp: Optional[BinaryIO] = None
+    out_buf: list[str] = []
     try:
         if args.jsonl:
-            json_fp = Path(args.jsonl).open("a", encoding="utf-8")
+            json_fp = Path(args.jsonl).open("ab", buffering=JSONL_BUFFER_BYTES)
 
 
-        source = follow_file(path, rules) if args.follow else scan_file(path, rules)
+        # severity filtering happens inside the scanners, before hits are built
+        min_sev_rank = SEV_RANK[args.min_severity]
+        if args.follow:
+            source = follow_file(path, rules, min_sev_rank=min_sev_rank)
+        else:
+            source = scan_file(path, rules, min_sev_rank)
         emit_output = not args.count_only
         collect_stats = (args.stats or args.count_only) and (not args.follow)
         rule_counts = Counter()
         ip_counts = Counter()
 
-        min_sev = args.min_severity
         dedupe_s = args.dedupe_seconds
         last_seen = {}  # key -> monotonic timestamp
 
         fail_rank = SEV_RANK.get(args.fail_on, 999) if args.fail_on else None
         worst_rank_seen = 0
 
-        for hit in source:
-            # 1) severity filter first
-            if not severity_ok(hit["severity"], min_sev):
-                continue
+        # follow mode is a live tail, so keep the JSONL file current after every hit
+        json_flush_every = 1 if args.follow else JSONL_FLUSH_EVERY
+        json_ct = 0
+        out_batch = 1 if args.follow else STDOUT_BATCH
 
-            # 2) dedupe (only if enabled)
+        for hit in source:
+            # 1) dedupe (only if enabled)
             if dedupe_s and dedupe_s > 0:
-                key = (hit.get("rule"), hit.get("user"))
+                key = (hit["rule"], hit["user"])
                 now = monotonic()
                 prev = last_seen.get(key)
                 if prev is not None and (now - prev) < dedupe_s:
                     continue
                 last_seen[key] = now
 
-            # 3) now it’s a “real” emitted hit: print + count + jsonl
+            # 2) now it’s a “real” emitted hit: print + count + jsonl
             if emit_output:
-                  print_hit(hit)
+                  out_buf.append(format_hit(hit))
+                  if len(out_buf) >= out_batch:
+                        flush_output(out_buf)
+                  if on_hit is not None:
+                        on_hit(hit)
 
             if collect_stats:
                 rule_counts[hit["rule"]] += 1
-                if hit.get("src_ip"):
+                if hit["src_ip"]:
                     ip_counts[hit["src_ip"]] += 1
 
-            rank = SEV_RANK.get(hit["severity"], 0)
-            if rank > worst_rank_seen:
-                worst_rank_seen = rank
+            if hit["sev_rank"] > worst_rank_seen:
+                worst_rank_seen = hit["sev_rank"]
 
             if json_fp:
                 write_jsonl(hit, json_fp)
+                json_ct += 1
+                if json_ct % json_flush_every == 0:
+                    json_fp.flush()
+
+        flush_output(out_buf)  # hits go out before the stats block
 
         if collect_stats:
             print("\n--- stats ---")
@@ -265,6 +584,7 @@ def main(argv: Optional[list[str]] = None) -> int:
     except KeyboardInterrupt:
         return 0
     finally:
+        flush_output(out_buf)  # anything still batched when interrupted
         if json_fp:
             json_fp.close()
 
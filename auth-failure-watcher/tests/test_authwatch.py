@@ -1,20 +1,31 @@
+import io
+import json
 import sys
 from pathlib import Path
 import tempfile
+import threading
+
+import pytest
 
 # Ensure we can import from src/ without installing a package
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 SRC_DIR = PROJECT_ROOT / "src"
 sys.path.insert(0, str(SRC_DIR))
 
+import authwatch.authwatch as aw  # noqa: E402
 from authwatch.authwatch import (  # noqa: E402
     severity_ok,
     extract_ip,
     extract_user,
     infer_service,
     build_rules,
+    find_candidate_lines,
+    iter_blocks,
     iter_hits_from_line,
     scan_file,
+    scan_file_hs,
+    utc_now_iso,
+    write_jsonl,
 )
 
 
@@ -30,6 +41,17 @@ def test_extract_ip_from_sshd_line():
     assert extract_ip(line) == "192.168.1.10"
 
 
+def test_extract_ip_normalizes_and_range_checks():
+    assert extract_ip("Failed password for root from 010.000.1.255 port 22") == "10.0.1.255"
+    assert extract_ip("Failed password for root from 256.1.1.1 port 22") is None
+    assert extract_ip("Failed password for root from 1.2.3.2555 port 22") is None
+    # only the first "from" counts, as before: a later valid address doesn't replace it
+    assert extract_ip("Failed password for root from 1.2.3.999 from 5.6.7.8 port 22") is None
+    assert extract_ip("Failed password for root from 300.1.1.1 port 22 from 9.9.9.9") is None
+    # only ASCII digits form an address
+    assert extract_ip("Failed password for root from \u0661\u0660.\u0660.\u0660.\u0661 port 22") is None
+
+
 def test_extract_user_valid_and_invalid_user():
     line1 = "Failed password for alice from 10.0.0.5 port 60000 ssh2"
     line2 = "Failed password for invalid user guest from 192.168.1.10 port 54321 ssh2"
@@ -56,6 +78,7 @@ def test_iter_hits_from_line_includes_fields():
     assert "ts" in hit
     assert hit["rule"] in {"failed_password", "accepted_password", "sudo"}
     assert hit["severity"] in {"low", "med", "high"}
+    assert hit["sev_rank"] == 3
     assert hit["path"] == str(path)
     assert "line" in hit
 
@@ -85,3 +108,181 @@ def test_scan_file_finds_expected_hits():
         rules_seen = {h["rule"] for h in hits}
         assert "failed_password" in rules_seen
         assert "accepted_password" in rules_seen
+
+
+def test_scan_file_hs_matches_line_scan():
+    pytest.importorskip("hyperscan")
+    sample_log = PROJECT_ROOT / "sample_logs" / "auth.log"
+
+    for ignore_case in (False, True):
+        rules = build_rules(ignore_case=ignore_case)
+        with sample_log.open("r", encoding="utf-8", errors="replace") as f:
+            expected = [
+                (h["rule"], h["line"], h["src_ip"], h["user"])
+                for line in f
+                for h in iter_hits_from_line(line, rules, sample_log)
+            ]
+        got = [(h["rule"], h["line"], h["src_ip"], h["user"]) for h in scan_file_hs(sample_log, rules)]
+        assert got == expected
+
+
+def test_scan_file_hs_matches_line_scan_on_unicode_and_lone_cr():
+    pytest.importorskip("hyperscan")
+    # Python's \b is Unicode-aware (no boundary between "é" and "F"), Hyperscan's is not;
+    # a lone \r is a line break in text mode
+    sample = (
+        "Dec 10 sshd[1]: xéFailed password for root from 10.0.0.1 port 1 ssh2\n"
+        "Dec 10 host ésudo: alice : COMMAND=/bin/ls\n"
+        "Dec 10 sshd[2]: Failed password for bob from 10.0.0.2 port 2 ssh2\r"
+        "Dec 10 host sudo: carol : COMMAND=/bin/ls\r\n"
+        "Dec 10 sshd[3]: ÀFailed password für éve from 10.0.0.3 port 3 ssh2 Failed password\n"
+    )
+    with tempfile.TemporaryDirectory() as d:
+        p = Path(d) / "auth.log"
+        p.write_bytes(sample.encode("utf-8"))
+
+        for ignore_case in (False, True):
+            rules = build_rules(ignore_case=ignore_case)
+            with p.open("r", encoding="utf-8", errors="replace") as f:
+                expected = [(h["rule"], h["line"]) for line in f for h in iter_hits_from_line(line, rules, p)]
+            got = [(h["rule"], h["line"]) for h in scan_file_hs(p, rules)]
+            assert got == expected
+            assert [r for r, _ in got] == ["failed_password", "sudo", "failed_password"]
+
+
+def test_literal_prefilter_respects_ignore_case():
+    line = "Dec 10 10:15:03 server SSHD[1234]: FAILED PASSWORD for root from 192.168.1.10 port 54322 ssh2"
+    path = Path("fake.log")
+
+    assert list(iter_hits_from_line(line, build_rules(ignore_case=False), path)) == []
+
+    hits = list(iter_hits_from_line(line, build_rules(ignore_case=True), path))
+    assert [h["rule"] for h in hits] == ["failed_password"]
+    assert hits[0]["service"] == "sshd"
+
+
+def test_ignore_case_folds_non_ascii_letters_like_re(monkeypatch):
+    # re.IGNORECASE matches "ı"/"İ" for "i" and "ſ" for "s"; str.lower(), bytes.lower() and Hyperscan don't
+    lines = ["Dec 10 sshd[1]: fa\u0131led password for root", "Dec 10 sshd[2]: FA\u0130LED PASSWORD", "Dec 10 \u017fudo: x"]
+    rules = build_rules(ignore_case=True)
+    path = Path("fake.log")
+    assert [[h["rule"] for h in iter_hits_from_line(line, rules, path)] for line in lines] == [
+        ["failed_password"],
+        ["failed_password"],
+        ["sudo"],
+    ]
+
+    with tempfile.TemporaryDirectory() as d:
+        p = Path(d) / "auth.log"
+        p.write_bytes("\n".join(lines).encode("utf-8"))
+        expected = ["failed_password", "failed_password", "sudo"]
+        if aw.hyperscan is not None:
+            assert [h["rule"] for h in scan_file_hs(p, rules)] == expected
+        monkeypatch.setattr(aw, "hyperscan", None)
+        assert [h["rule"] for h in scan_file(p, rules)] == expected
+
+
+def test_utc_now_iso_format():
+    ts = utc_now_iso()
+    assert len(ts) == 20
+    assert ts[4] == "-" and ts[10] == "T" and ts.endswith("Z")
+
+
+def test_min_sev_rank_skips_lower_rules():
+    rules = build_rules(ignore_case=False)
+    path = Path("fake.log")
+    line = "Dec 10 10:16:01 server sshd[1300]: Accepted password for alice from 10.0.0.5 port 60000 ssh2"
+
+    assert [h["rule"] for h in iter_hits_from_line(line, rules, path)] == ["accepted_password"]
+    assert list(iter_hits_from_line(line, rules, path, min_sev_rank=3)) == []
+
+
+def test_iter_blocks_ends_on_line_boundaries():
+    data = b"first line\r\nsecond line\nthird line with no newline"
+    with tempfile.TemporaryDirectory() as d:
+        p = Path(d) / "auth.log"
+        p.write_bytes(data)
+
+        for block_size in (4, aw.READ_BLOCK_BYTES):
+            blocks = list(iter_blocks(p, block_size=block_size))
+            assert b"".join(blocks) == data
+            assert all(b.endswith(b"\n") for b in blocks[:-1])
+
+
+def test_split_lines_matches_text_mode():
+    sample = "first line\r\nsecond\rline\nn\u00e4me\r\n\nthird line with no newline"
+    with tempfile.TemporaryDirectory() as d:
+        p = Path(d) / "auth.log"
+        p.write_bytes(sample.encode("utf-8"))
+        with p.open("r", encoding="utf-8", errors="replace") as f:
+            expected = [line.rstrip("\n") for line in f]
+
+    assert aw._split_lines(sample.encode("utf-8")) == expected
+    assert aw._split_lines(b"") == []
+
+
+def test_find_candidate_lines_returns_whole_lines():
+    block = b"nothing here\nsshd: Failed password x Failed password\nsudo: root\nlast Failed password"
+    spans = find_candidate_lines(block, [b"Failed password", b"sudo:"])
+    assert [block[s:e] for s, e in spans] == [
+        b"sshd: Failed password x Failed password",
+        b"sudo: root",
+        b"last Failed password",
+    ]
+
+
+def test_scan_file_block_path_matches_line_scan(monkeypatch):
+    monkeypatch.setattr(aw, "hyperscan", None)
+    sample_log = PROJECT_ROOT / "sample_logs" / "auth.log"
+
+    for ignore_case in (False, True):
+        rules = build_rules(ignore_case=ignore_case)
+        with sample_log.open("r", encoding="utf-8", errors="replace") as f:
+            expected = [(h["rule"], h["line"]) for line in f for h in iter_hits_from_line(line, rules, sample_log)]
+        assert [(h["rule"], h["line"]) for h in scan_file(sample_log, rules)] == expected
+
+
+def test_follow_file_yields_appended_lines():
+    with tempfile.TemporaryDirectory() as d:
+        p = Path(d) / "auth.log"
+        p.write_text("Dec 10 sshd[1]: Failed password for old from 10.0.0.1 port 1 ssh2\n", encoding="utf-8")
+
+        def append():
+            with p.open("a", encoding="utf-8") as f:
+                f.write("Dec 10 sshd[2]: Failed password for new from 10.0.0.2 port 2 ssh2\n")
+
+        # follow starts at EOF, so the existing line is skipped and only the later write is seen
+        gen = aw.follow_file(p, build_rules(ignore_case=False), sleep_s=0.01)
+        try:
+            threading.Timer(0.1, append).start()
+            hit = next(gen)
+        finally:
+            gen.close()
+
+        assert hit["user"] == "new"
+        assert hit["src_ip"] == "10.0.0.2"
+
+
+def test_write_jsonl_writes_one_utf8_record_per_line():
+    hits = [
+        {"rule": "failed_password", "line": "Failed password for jos\u00e9", "src_ip": None},
+        {"rule": "sudo", "line": "sudo: root", "src_ip": "10.0.0.1"},
+    ]
+    buf = io.BytesIO()
+    for hit in hits:
+        write_jsonl(hit, buf)
+
+    lines = buf.getvalue().decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == hits
+    assert "jos\u00e9" in lines[0]  # not \u-escaped
+
+
+def test_multi_rule_line_shares_extracted_fields():
+    rules = build_rules(ignore_case=False)
+    line = "Dec 10 10:20:00 server sudo: pam_unix(sudo:auth): Failed password for bob from 10.0.0.9 port 22"
+
+    hits = list(iter_hits_from_line(line, rules, Path("fake.log")))
+    assert [h["rule"] for h in hits] == ["failed_password", "sudo"]
+    for h in hits:
+        assert (h["src_ip"], h["user"], h["service"]) == ("10.0.0.9", "bob", "sudo")
+    assert hits[0]["ts"] == hits[1]["ts"]
@@ -0,0 +1,100 @@
+import sys
+import threading
+import types
+from pathlib import Path
+
+# ci_run_authwatch.py lives at the project root, next to tests/
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from ci_run_authwatch import (  # noqa: E402
+    iter_findings,
+    load_authwatch,
+    parse_finding_line,
+    run_authwatch_inprocess,
+    wants_follow,
+)
+
+AUTHWATCH_PATH = PROJECT_ROOT / "src" / "authwatch" / "authwatch.py"
+
+
+def test_parse_finding_line_documented_format():
+    f = parse_finding_line("[HIGH] failed_password :: Dec 10 10:15:03 server sshd[1234]: Failed password\n")
+    assert f is not None
+    assert f.severity == "high"
+    assert f.event_type == "failed_password"
+    assert f.raw == "[HIGH] failed_password :: Dec 10 10:15:03 server sshd[1234]: Failed password"
+
+
+def test_parse_finding_line_rejects_non_findings():
+    assert parse_finding_line("--- stats ---") is None
+    assert parse_finding_line("failed_password: 5") is None
+    assert parse_finding_line("[high]failed_password :: x") is None
+    assert parse_finding_line("[h1gh] failed_password :: x") is None
+    assert parse_finding_line("[high]") is None
+
+
+def test_inprocess_findings_match_stdout_parsing():
+    aw = load_authwatch(AUTHWATCH_PATH)
+    assert aw is not None
+
+    rc, out, err, cmd, findings = run_authwatch_inprocess(
+        aw, AUTHWATCH_PATH, PROJECT_ROOT / "sample_logs" / "auth.log", ["--stats"], 60
+    )
+    assert rc == 0
+    assert err == ""
+    parsed = [f for f in map(parse_finding_line, out.splitlines()) if f]
+    assert findings == parsed
+    assert findings
+
+
+def test_iter_findings_matches_per_line_parsing():
+    out = (
+        "[high] failed_password :: Dec 10 sshd: Failed password for root\n"
+        "\n--- stats ---\nfailed_password: 1\n"
+        "  [low] accepted_password :: Dec 10 sshd: Accepted password for alice  \n"
+        "[med]\n"
+        "[med] sudo\r\n"
+        # splitlines() also breaks on these, so each starts a new line
+        "[low] x :: y\x0c[high] fake :: z\x85[low] a\u2028[med] b\u3000\r"
+    )
+    expected = [f for f in map(parse_finding_line, out.splitlines()) if f]
+    assert [f.event_type for f in expected] == [
+        "failed_password", "accepted_password", "sudo", "x", "fake", "a", "b",
+    ]
+    assert list(iter_findings(out)) == expected
+
+
+def test_inprocess_crash_is_reported_like_a_failed_subprocess(tmp_path):
+    aw = load_authwatch(AUTHWATCH_PATH)
+    assert aw is not None
+
+    # --jsonl pointing at a directory makes authwatch raise while opening it
+    rc, out, err, cmd, findings = run_authwatch_inprocess(
+        aw, AUTHWATCH_PATH, PROJECT_ROOT / "sample_logs" / "auth.log", ["--jsonl", str(tmp_path)], 60
+    )
+    assert rc != 0
+    assert "Traceback" in err
+    assert findings == []
+
+
+def test_inprocess_run_is_cut_off_at_the_timeout():
+    release = threading.Event()
+    stuck = types.SimpleNamespace(main=lambda argv, on_hit=None: release.wait())
+
+    rc, out, err, cmd, findings = run_authwatch_inprocess(
+        stuck, AUTHWATCH_PATH, PROJECT_ROOT / "sample_logs" / "auth.log", [], 1
+    )
+    release.set()
+    assert rc == 124
+    assert "timed out" in err
+
+
+def test_wants_follow_accepts_abbreviations():
+    aw = load_authwatch(AUTHWATCH_PATH)
+    assert aw is not None
+
+    assert wants_follow(aw, ["--fol"])
+    assert wants_follow(aw, ["--stats", "--follow"])
+    assert not wants_follow(aw, ["--stats"])
+    assert not wants_follow(aw, ["--no-such-flag"])